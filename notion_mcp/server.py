@@ -6,35 +6,475 @@ integration with Notion, allowing AI assistants to create, read, update,
 and search Notion pages and databases.
 """
 
+import io
+import json
 import os
+import asyncio
+import atexit
+import functools
 import logging
-from typing import Optional, List, Dict, Any
+import logging.handlers
+import queue
+import random
+import re
+import sqlite3
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Optional, List, Dict, Any, Union, Awaitable, Callable, Tuple
+import httpx
+from aiolimiter import AsyncLimiter
+from cachetools import TTLCache
 from dotenv import load_dotenv
-from notion_client import Client
+from notion_client import AsyncClient
 from notion_client.errors import APIResponseError
 from mcp.server.fastmcp import FastMCP
 
-# Load environment variables
-load_dotenv()
-
-# Configure logging to stderr (important for MCP stdio transport)
+# Configure logging to stderr (important for MCP stdio transport). Records are
+# formatted by the QueueHandler and written by a background thread, so the
+# event loop never blocks on stderr.
+_log_queue = queue.SimpleQueue()
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[logging.StreamHandler()]
+    handlers=[logging.handlers.QueueHandler(_log_queue)]
 )
+_log_listener = logging.handlers.QueueListener(_log_queue, logging.StreamHandler())
+_log_listener.start()
+atexit.register(_log_listener.stop)
 logger = logging.getLogger(__name__)
 
 # Initialize the MCP server
 mcp = FastMCP("notion-mcp-server")
 
-# Initialize Notion client
-notion_api_key = os.getenv("NOTION_API_KEY")
-if not notion_api_key:
-    logger.error("NOTION_API_KEY environment variable not set")
-    raise ValueError("NOTION_API_KEY must be set in environment variables")
+async def _log_http_version(response: httpx.Response) -> None:
+    """Log the negotiated protocol so HTTP/2 multiplexing can be confirmed."""
+    logger.debug("%s %s -> %s", response.request.method, response.url, response.http_version)
+
+
+# Timeouts for the shared HTTP client: 30s overall, 5s to establish a connection
+HTTP_TIMEOUT = httpx.Timeout(30.0, connect=5.0)
+
+
+@functools.cache
+def _client() -> AsyncClient:
+    """
+    Build the Notion client on first use, so importing this module stays cheap.
+    
+    A single pooled HTTP transport is shared across all tool calls so TCP+TLS
+    connections are kept alive and reused instead of renegotiated per request.
+    HTTP/2 lets concurrent requests share one connection as separate streams.
+    """
+    notion_api_key = os.getenv("NOTION_API_KEY")
+    if not notion_api_key:
+        logger.error("NOTION_API_KEY environment variable not set")
+        raise ValueError("NOTION_API_KEY must be set in environment variables")
+    
+    http_client = httpx.AsyncClient(
+        transport=httpx.AsyncHTTPTransport(
+            http2=True,
+            retries=0,
+            limits=httpx.Limits(max_connections=10, max_keepalive_connections=10)
+        ),
+        event_hooks={"response": [_log_http_version]}
+    )
+    # Retries are handled by _notion_call, outside the rate and concurrency limits
+    notion = AsyncClient(auth=notion_api_key, client=http_client, retry=False)
+    # notion_client overwrites the timeout of the client it is given; reapply ours
+    http_client.timeout = HTTP_TIMEOUT
+    return notion
+
+
+# Existing page found by create_page's opt-in parent search, reused for the
+# life of the process
+_fallback_parent_page_id: Optional[str] = None
+
+# Short-lived cache for search results; keys must cover every input argument.
+# Cleared by any tool that mutates the workspace so results never go stale.
+_search_cache = TTLCache(maxsize=256, ttl=30)
+
+# Results of create calls keyed by caller-supplied idempotency key, or a future
+# while the first call is still running. Notion has no native idempotency
+# support, so a retried create with the same key returns the original result
+# instead of creating a duplicate page.
+_idempotency_cache = TTLCache(maxsize=1024, ttl=3600)
 
-notion = Client(auth=notion_api_key)
+# Recently seen page objects keyed by normalized page ID, refreshed by every
+# update and by retrieves that no write overlapped, so update_page can skip
+# writes that would change nothing
+_page_cache = TTLCache(maxsize=1024, ttl=30)
+
+# Two-tier cache of get_page_content results. The in-memory tier answers repeat
+# reads outright; the SQLite tier survives restarts and is reused only while the
+# page's last_edited_time is unchanged. Notion reports that time to the minute,
+# so a stored copy fetched in the same minute as its last edit is never trusted.
+# Both tiers are invalidated by write tools. SQLite work runs in worker threads
+# to keep it off the event loop.
+_page_content_cache = TTLCache(maxsize=128, ttl=60)
+_disk_cache_lock = threading.Lock()
+DEFAULT_PAGE_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "notion-mcp", "pages.sqlite3")
+PAGE_CACHE_SCHEMA_VERSION = 1
+# The disk tier is pruned on every write to at most this many of the most
+# recently fetched pages, none older than the max age
+PAGE_CACHE_MAX_ENTRIES = 1000
+PAGE_CACHE_MAX_AGE = timedelta(days=30)
+
+# Bumped on every invalidation, per page and globally by invalidate_cache. A
+# read snapshots both before fetching and caches nothing if either moved, so a
+# read that overlaps a write can't put pre-write content back in the caches.
+_page_generations: Dict[str, int] = {}
+_cache_epoch = 0
+
+# Client-side token bucket matching Notion's limit of 3 requests per second,
+# so bursts queue locally instead of being rejected with HTTP 429
+_limiter = AsyncLimiter(3, 1)
+MAX_RATE_LIMIT_RETRIES = 3
+
+# Transient server errors, retried only for idempotent reads so a write that
+# may already have been applied is never sent twice
+_RETRYABLE_READ_STATUSES = frozenset({500, 503})
+
+# Requests allowed in flight at once unless NOTION_MAX_CONCURRENT_REQUESTS says otherwise
+DEFAULT_MAX_CONCURRENT_REQUESTS = 20
+
+# Notion rejects requests carrying more than 100 child blocks
+MAX_BLOCKS_PER_REQUEST = 100
+
+# Notion object IDs are UUIDs; checked after dashes are stripped
+_UUID_RE = re.compile(r"[0-9a-f]{32}")
+
+# Blocks whose children are separate pages rather than part of this page's content
+_OPAQUE_BLOCK_TYPES = frozenset({"child_page", "child_database"})
+
+# Block types whose text lives in a "rich_text" array
+_TEXTY_BLOCK_TYPES = frozenset({
+    "paragraph",
+    "heading_1",
+    "heading_2",
+    "heading_3",
+    "bulleted_list_item",
+    "numbered_list_item",
+    "to_do",
+    "toggle",
+    "quote",
+    "callout",
+    "code",
+    "template",
+})
+
+
+# ============================================================================
+# HELPERS
+# ============================================================================
+
+def _extract_rich_text(block_content: Dict[str, Any]) -> str:
+    """Concatenate the plain text of a block's rich_text array."""
+    return "".join(rt["plain_text"] for rt in block_content.get("rich_text", ()) if "plain_text" in rt)
+
+
+def _page_key(page_id: str) -> str:
+    """Normalize a page ID so dashed and undashed forms share a cache entry."""
+    return page_id.replace("-", "").lower()
+
+
+def _is_valid_id(object_id: str) -> bool:
+    """Check that an ID is a Notion UUID (32 hex digits, dashes optional)."""
+    return _UUID_RE.fullmatch(_page_key(object_id)) is not None
+
+
+def _paragraph_block(text: str) -> Dict[str, Any]:
+    """Build a paragraph block containing a single run of plain text."""
+    return {
+        "object": "block",
+        "type": "paragraph",
+        "paragraph": {"rich_text": [{"type": "text", "text": {"content": text}}]}
+    }
+
+
+def _title_property(title: str) -> Dict[str, Any]:
+    """Build the properties payload that sets a page's title."""
+    return {"title": {"title": [{"text": {"content": title}}]}}
+
+
+def _extract_title(page: Dict[str, Any]) -> str:
+    """Return the plain-text title of a page, or "Untitled" if it has none."""
+    return next(
+        (
+            prop["title"][0]["plain_text"]
+            for prop in page.get("properties", {}).values()
+            if prop.get("type") == "title" and prop.get("title")
+        ),
+        "Untitled"
+    )
+
+
+# Block type -> text extractor, looked up once per block in get_page_content
+_EXTRACTORS = dict.fromkeys(_TEXTY_BLOCK_TYPES, _extract_rich_text)
+
+
+@functools.cache
+def _disk_cache() -> Optional[sqlite3.Connection]:
+    """
+    Open the persistent page-content cache on first use.
+    
+    Returns None if the cache is disabled with an empty NOTION_PAGE_CACHE_PATH
+    or cannot be opened, in which case only the in-memory tier is used.
+    """
+    path = os.getenv("NOTION_PAGE_CACHE_PATH", DEFAULT_PAGE_CACHE_PATH)
+    if not path:
+        return None
+    try:
+        # Cached pages may be private, so keep them readable by this user only
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), mode=0o700, exist_ok=True)
+        os.close(os.open(path, os.O_CREAT | os.O_RDWR, 0o600))
+        os.chmod(path, 0o600)
+        conn = sqlite3.connect(path, check_same_thread=False)
+        with conn:
+            # Rows from an older layout are just cached data; drop them
+            if conn.execute("PRAGMA user_version").fetchone()[0] != PAGE_CACHE_SCHEMA_VERSION:
+                conn.execute("DROP TABLE IF EXISTS pages")
+                conn.execute(f"PRAGMA user_version = {PAGE_CACHE_SCHEMA_VERSION}")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS pages "
+                "(page_id TEXT PRIMARY KEY, last_edited TEXT, fetched_at TEXT, body BLOB)"
+            )
+        return conn
+    except (OSError, sqlite3.Error) as e:
+        logger.warning("Page cache at %s unavailable, continuing without it: %s", path, e)
+        return None
+
+
+def _disk_cache_op(op: Callable[[sqlite3.Connection], Any]) -> Any:
+    """
+    Run one operation against the disk cache in its own transaction.
+    
+    Called from worker threads, so access is serialized with a lock. Failures
+    are logged and return None: cache errors never fail a read or a write.
+    """
+    with _disk_cache_lock:
+        conn = _disk_cache()
+        if conn is None:
+            return None
+        try:
+            with conn:
+                return op(conn)
+        except (sqlite3.Error, ValueError) as e:
+            logger.warning("Page cache operation failed: %s", e)
+            return None
+
+
+def _generation(key: str) -> Tuple[int, int]:
+    """Snapshot of how many times a page's cached content has been invalidated."""
+    return _cache_epoch, _page_generations.get(key, 0)
+
+
+def _fetched_after_edit(fetched_at: str, last_edited: Optional[str]) -> bool:
+    """Check that a fetch started in a later minute than the page's last edit."""
+    try:
+        fetched = datetime.fromisoformat(fetched_at)
+        edited = datetime.fromisoformat(last_edited.replace("Z", "+00:00"))
+    except (AttributeError, TypeError, ValueError):
+        return False
+    return fetched.replace(second=0, microsecond=0) > edited.replace(second=0, microsecond=0)
+
+
+async def _read_disk_cache(key: str) -> Optional[Tuple[Dict[str, Any], str]]:
+    """Return the stored get_page_content result for a page and when it was fetched, if any."""
+    def read(conn: sqlite3.Connection) -> Optional[Tuple[Dict[str, Any], str]]:
+        row = conn.execute("SELECT body, fetched_at FROM pages WHERE page_id = ?", (key,)).fetchone()
+        return (json.loads(row[0]), row[1]) if row else None
+    return await asyncio.to_thread(_disk_cache_op, read)
+
+
+async def _write_disk_cache(
+    key: str,
+    result: Dict[str, Any],
+    fetched_at: str,
+    generation: Tuple[int, int]
+) -> None:
+    """Store a get_page_content result, replacing any older copy, unless the page was invalidated since `generation`."""
+    body = json.dumps(result).encode()
+    cutoff = (datetime.now(timezone.utc) - PAGE_CACHE_MAX_AGE).isoformat(timespec="microseconds")
+    def write(conn: sqlite3.Connection) -> None:
+        # Checked under the lock, so an invalidation either lands first and
+        # this write is skipped, or lands after and deletes the row
+        if _generation(key) == generation:
+            conn.execute(
+                "INSERT OR REPLACE INTO pages (page_id, last_edited, fetched_at, body) VALUES (?, ?, ?, ?)",
+                (key, result["last_edited"], fetched_at, body)
+            )
+        conn.execute("DELETE FROM pages WHERE fetched_at < ?", (cutoff,))
+        conn.execute(
+            "DELETE FROM pages WHERE page_id NOT IN "
+            "(SELECT page_id FROM pages ORDER BY fetched_at DESC LIMIT ?)",
+            (PAGE_CACHE_MAX_ENTRIES,)
+        )
+    await asyncio.to_thread(_disk_cache_op, write)
+
+
+async def _invalidate_page_content(page_id: str) -> None:
+    """Drop a page's cached content from both cache tiers after it is modified."""
+    key = _page_key(page_id)
+    _page_generations[key] = _page_generations.get(key, 0) + 1
+    _page_content_cache.pop(key, None)
+    await asyncio.to_thread(_disk_cache_op, lambda conn: conn.execute(
+        "DELETE FROM pages WHERE page_id = ?", (key,)
+    ))
+
+
+@functools.cache
+def _inflight() -> asyncio.Semaphore:
+    """
+    Cap on requests in flight at once, so large bursts of tool calls queue here
+    instead of exhausting the connection pool and timing out.
+    """
+    value = os.getenv("NOTION_MAX_CONCURRENT_REQUESTS", "")
+    try:
+        limit = int(value or DEFAULT_MAX_CONCURRENT_REQUESTS)
+    except ValueError:
+        limit = 0
+    if limit < 1:
+        logger.warning(
+            "Invalid NOTION_MAX_CONCURRENT_REQUESTS %r, using %d",
+            value, DEFAULT_MAX_CONCURRENT_REQUESTS
+        )
+        limit = DEFAULT_MAX_CONCURRENT_REQUESTS
+    return asyncio.Semaphore(limit)
+
+
+def _retry_delay(error: APIResponseError, attempt: int) -> float:
+    """Seconds to wait before retrying a rate-limited or failed request."""
+    backoff = 2 ** attempt
+    retry_after = error.headers.get("Retry-After") if error.headers else None
+    if retry_after:
+        try:
+            backoff = max(backoff, float(retry_after))
+        except ValueError:
+            pass
+    return backoff + random.uniform(0, 1)
+
+
+async def _notion_call(method: Callable[..., Awaitable[Any]], *, idempotent: bool = False, **kwargs) -> Any:
+    """
+    Call a Notion API method under the rate and concurrency limits, retrying on
+    HTTP 429, and also on HTTP 500/503 when the call is an idempotent read.
+    """
+    for attempt in range(MAX_RATE_LIMIT_RETRIES + 1):
+        async with _limiter, _inflight():
+            try:
+                return await method(**kwargs)
+            except APIResponseError as e:
+                retryable = e.status == 429 or (idempotent and e.status in _RETRYABLE_READ_STATUSES)
+                if not retryable or attempt == MAX_RATE_LIMIT_RETRIES:
+                    raise
+                status = e.status
+                delay = _retry_delay(e, attempt)
+        if status == 429:
+            logger.warning("Rate limited by Notion, retrying in %.1fs", delay)
+        else:
+            logger.warning("Notion returned HTTP %d, retrying in %.1fs", status, delay)
+        await asyncio.sleep(delay)
+
+
+async def _run_idempotent(
+    tool: str,
+    idempotency_key: Optional[str],
+    create: Callable[[], Awaitable[Dict[str, Any]]]
+) -> Dict[str, Any]:
+    """
+    Run a create call at most once per idempotency key.
+    
+    While the first call is in flight, its key maps to a future that duplicate
+    calls await, so overlapping retries share one result. Once the object
+    exists its result is kept, even if a later step failed, so a retry can
+    never create a duplicate. Failures before that point release the key.
+    """
+    if not idempotency_key:
+        return await create()
+    
+    cache_key = (tool, idempotency_key)
+    existing = _idempotency_cache.get(cache_key)
+    if isinstance(existing, asyncio.Future):
+        return await asyncio.shield(existing)
+    if existing is not None:
+        return existing
+    
+    pending = asyncio.get_running_loop().create_future()
+    _idempotency_cache[cache_key] = pending
+    result = None
+    try:
+        result = await create()
+        return result
+    finally:
+        if result is not None and result.get("page_id"):
+            _idempotency_cache[cache_key] = result
+        else:
+            _idempotency_cache.pop(cache_key, None)
+        pending.set_result(result if result is not None else {
+            "success": False,
+            "error": "Request was cancelled before completing"
+        })
+
+
+async def _append_blocks(block_id: str, blocks: List[Dict[str, Any]]) -> None:
+    """Append blocks to a page, batching up to MAX_BLOCKS_PER_REQUEST per call."""
+    for i in range(0, len(blocks), MAX_BLOCKS_PER_REQUEST):
+        await _notion_call(
+            _client().blocks.children.append,
+            block_id=block_id,
+            children=blocks[i:i + MAX_BLOCKS_PER_REQUEST]
+        )
+
+
+async def _list_all_children(block_id: str) -> List[Dict[str, Any]]:
+    """Fetch every child block of a block, following Notion's pagination cursor."""
+    results = []
+    params = {"block_id": block_id, "page_size": MAX_BLOCKS_PER_REQUEST}
+    while True:
+        response = await _notion_call(_client().blocks.children.list, idempotent=True, **params)
+        results.extend(response.get("results", []))
+        if not response.get("has_more"):
+            return results
+        params["start_cursor"] = response["next_cursor"]
+
+
+async def _find_fallback_parent() -> Optional[str]:
+    """Find any existing page to use as a parent, searching at most once per process."""
+    global _fallback_parent_page_id
+    if _fallback_parent_page_id is None:
+        logger.warning("No parent page configured, using the first page found in the workspace")
+        search_results = await _notion_call(_client().search, filter={"property": "object", "value": "page"}, page_size=1)
+        if search_results.get("results"):
+            _fallback_parent_page_id = search_results["results"][0]["id"]
+    return _fallback_parent_page_id
+
+
+async def _fetch_block_tree(root_id: str) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Fetch a block and all of its nested descendants, one tree level at a time.
+    
+    Every block with children on the current level is listed concurrently
+    (bounded by the in-flight semaphore), so latency grows with nesting depth
+    rather than block count. Child pages and databases are not descended into.
+    
+    Returns:
+        Mapping of block ID to its ordered list of child blocks
+    """
+    tree = {}
+    level = [root_id]
+    while level:
+        children_lists = await asyncio.gather(*(_list_all_children(block_id) for block_id in level))
+        next_level = []
+        for block_id, children in zip(level, children_lists):
+            tree[block_id] = children
+            next_level.extend(
+                child["id"] for child in children
+                if child.get("has_children")
+                and child.get("type") not in _OPAQUE_BLOCK_TYPES
+                and child["id"] not in tree
+            )
+        level = list(dict.fromkeys(next_level))
+    return tree
 
 
 # ============================================================================
@@ -42,105 +482,114 @@ notion = Client(auth=notion_api_key)
 # ============================================================================
 
 @mcp.tool()
-def create_page(title: str, content: str, parent_page_id: Optional[str] = None) -> Dict[str, Any]:
+async def create_page(
+    title: str,
+    content: Union[str, List[str]],
+    parent_page_id: Optional[str] = None,
+    idempotency_key: Optional[str] = None
+) -> Dict[str, Any]:
     """
     Create a new page in Notion.
     
     Args:
         title: The title of the new page
-        content: The text content to add to the page
-        parent_page_id: Optional ID of the parent page. If not provided, creates a top-level page
+        content: The text content to add to the page, or a list of paragraphs
+        parent_page_id: Optional ID of the parent page. Defaults to NOTION_DEFAULT_PARENT_PAGE_ID
+        idempotency_key: Optional unique key for this request. Retrying with the same key
+            within an hour returns the original result instead of creating a duplicate page
     
     Returns:
         Dictionary with the created page's ID and URL
     """
-    try:
-        # Build the parent structure
-        if parent_page_id:
-            parent = {"page_id": parent_page_id}
-        else:
-            # Search for a page to use as parent, or you can configure a default page ID
-            parent = {"page_id": parent_page_id} if parent_page_id else {"type": "page_id", "page_id": ""}
-        
-        # Create page properties
-        properties = {
-            "title": {
-                "title": [
-                    {
-                        "text": {
-                            "content": title
-                        }
-                    }
-                ]
-            }
+    if parent_page_id and not _is_valid_id(parent_page_id):
+        return {
+            "success": False,
+            "error": "Invalid parent_page_id format"
         }
-        
-        # Create page content (children blocks)
-        children = [
-            {
-                "object": "block",
-                "type": "paragraph",
-                "paragraph": {
-                    "rich_text": [
-                        {
-                            "type": "text",
-                            "text": {
-                                "content": content
-                            }
-                        }
-                    ]
-                }
+    
+    # Resolve the parent page without searching the workspace on the hot path;
+    # falling back to an arbitrary existing page is opt-in, as it costs an extra API call
+    parent_page_id = parent_page_id or os.getenv("NOTION_DEFAULT_PARENT_PAGE_ID")
+    if not parent_page_id and os.getenv("NOTION_AUTOCREATE_UNDER_ANY_PAGE") == "1":
+        try:
+            parent_page_id = await _find_fallback_parent()
+        except Exception as e:
+            logger.error("Error finding a parent page: %s", e)
+            return {
+                "success": False,
+                "error": str(e)
             }
-        ]
-        
-        # Make API call - if no parent_page_id, we need to handle differently
-        if parent_page_id:
-            response = notion.pages.create(
-                parent=parent,
-                properties=properties,
-                children=children
-            )
-        else:
-            # For top-level pages, we need a workspace parent or database parent
-            # This will require user to specify or configure a default database/page
-            logger.warning("No parent_page_id provided. Page creation may fail without a parent.")
-            # Try to search for recent pages and use the first one as parent
-            search_results = notion.search(filter={"property": "object", "value": "page"}, page_size=1)
-            if search_results.get("results"):
-                parent = {"page_id": search_results["results"][0]["id"]}
-                response = notion.pages.create(
-                    parent=parent,
-                    properties=properties,
-                    children=children
-                )
-            else:
-                return {
-                    "error": "No parent page specified and no existing pages found. Please provide a parent_page_id."
-                }
-        
+    if not parent_page_id:
         return {
-            "success": True,
-            "page_id": response["id"],
-            "url": response["url"],
-            "message": f"Page '{title}' created successfully"
+            "success": False,
+            "error": "No parent page specified. Please provide a parent_page_id or set NOTION_DEFAULT_PARENT_PAGE_ID."
         }
     
+    result = await _run_idempotent(
+        "create_page",
+        idempotency_key,
+        lambda: _create_page(title, content, parent_page_id)
+    )
+    if result.get("page_id"):
+        # The parent page gains a child_page block
+        await _invalidate_page_content(parent_page_id)
+    return result
+
+
+async def _create_page(title: str, content: Union[str, List[str]], parent_page_id: str) -> Dict[str, Any]:
+    """Create a page under a resolved parent; the body of the create_page tool."""
+    try:
+        # Create page properties
+        properties = _title_property(title)
+        
+        # Create page content (children blocks), one paragraph per entry
+        paragraphs = [content] if isinstance(content, str) else content
+        children = [_paragraph_block(text) for text in paragraphs]
+        
+        response = await _notion_call(
+            _client().pages.create,
+            parent={"page_id": parent_page_id},
+            properties=properties,
+            children=children[:MAX_BLOCKS_PER_REQUEST]
+        )
+        _search_cache.clear()
+    
     except APIResponseError as e:
-        logger.error(f"Notion API error: {e}")
+        logger.error("Notion API error: %s", e)
         return {
             "success": False,
             "error": f"Notion API error: {str(e)}"
         }
     except Exception as e:
-        logger.error(f"Error creating page: {e}")
+        logger.error("Error creating page: %s", e)
         return {
             "success": False,
             "error": str(e)
         }
+    
+    try:
+        # Anything past the per-request limit is appended in follow-up batches
+        await _append_blocks(response["id"], children[MAX_BLOCKS_PER_REQUEST:])
+    except Exception as e:
+        # The page exists, so report it; retrying the whole create would duplicate it
+        logger.error("Error appending content to new page: %s", e)
+        return {
+            "success": False,
+            "page_id": response["id"],
+            "url": response["url"],
+            "error": f"Page '{title}' was created but appending its content failed: {str(e)}"
+        }
+    
+    return {
+        "success": True,
+        "page_id": response["id"],
+        "url": response["url"],
+        "message": f"Page '{title}' created successfully"
+    }
 
 
 @mcp.tool()
-def search_pages(query: str, page_size: int = 10) -> Dict[str, Any]:
+async def search_pages(query: str, page_size: int = 10) -> Dict[str, Any]:
     """
     Search for pages in Notion by title or content.
     
@@ -151,9 +600,15 @@ def search_pages(query: str, page_size: int = 10) -> Dict[str, Any]:
     Returns:
         Dictionary containing search results with page titles, IDs, and URLs
     """
+    key = ("search", query, page_size)
+    cached = _search_cache.get(key)
+    if cached is not None:
+        return cached
+    
     try:
         # Search for pages
-        response = notion.search(
+        response = await _notion_call(
+            _client().search,
             query=query,
             filter={"property": "object", "value": "page"},
             page_size=page_size
@@ -162,17 +617,7 @@ def search_pages(query: str, page_size: int = 10) -> Dict[str, Any]:
         # Format results
         results = []
         for page in response.get("results", []):
-            title = "Untitled"
-            if "properties" in page and "title" in page["properties"]:
-                title_property = page["properties"]["title"]
-                if title_property.get("title"):
-                    title = title_property["title"][0]["plain_text"]
-            elif "properties" in page:
-                # Try to find any title field
-                for prop_name, prop_value in page["properties"].items():
-                    if prop_value.get("type") == "title" and prop_value.get("title"):
-                        title = prop_value["title"][0]["plain_text"]
-                        break
+            title = _extract_title(page)
             
             results.append({
                 "id": page["id"],
@@ -181,20 +626,22 @@ def search_pages(query: str, page_size: int = 10) -> Dict[str, Any]:
                 "last_edited": page.get("last_edited_time", "Unknown")
             })
         
-        return {
+        result = {
             "success": True,
             "count": len(results),
             "results": results
         }
+        _search_cache[key] = result
+        return result
     
     except APIResponseError as e:
-        logger.error(f"Notion API error: {e}")
+        logger.error("Notion API error: %s", e)
         return {
             "success": False,
             "error": f"Notion API error: {str(e)}"
         }
     except Exception as e:
-        logger.error(f"Error searching pages: {e}")
+        logger.error("Error searching pages: %s", e)
         return {
             "success": False,
             "error": str(e)
@@ -202,7 +649,7 @@ def search_pages(query: str, page_size: int = 10) -> Dict[str, Any]:
 
 
 @mcp.tool()
-def get_page_content(page_id: str) -> Dict[str, Any]:
+async def get_page_content(page_id: str) -> Dict[str, Any]:
     """
     Retrieve the content of a specific Notion page.
     
@@ -210,42 +657,71 @@ def get_page_content(page_id: str) -> Dict[str, Any]:
         page_id: The ID of the page to retrieve
     
     Returns:
-        Dictionary containing the page title and content blocks
+        Dictionary containing the page title and content blocks, including
+        nested blocks with their nesting depth
     """
+    if not _is_valid_id(page_id):
+        return {
+            "success": False,
+            "error": "Invalid page_id format"
+        }
+    
+    key = _page_key(page_id)
+    cached = _page_content_cache.get(key)
+    if cached is not None:
+        return cached
+    
+    generation = _generation(key)
+    fetched_at = datetime.now(timezone.utc).isoformat(timespec="microseconds")
     try:
-        # Get page properties
-        page = notion.pages.retrieve(page_id=page_id)
-        
-        # Extract title
-        title = "Untitled"
-        if "properties" in page:
-            for prop_name, prop_value in page["properties"].items():
-                if prop_value.get("type") == "title" and prop_value.get("title"):
-                    title = prop_value["title"][0]["plain_text"]
-                    break
+        row = await _read_disk_cache(key)
+        if row is not None:
+            stored, stored_fetched_at = row
+            # Retrieving the page alone is cheap; skip the block fetch if it hasn't changed
+            page = await _notion_call(_client().pages.retrieve, idempotent=True, page_id=page_id)
+            if _generation(key) == generation:
+                _page_cache[key] = page
+            if (page.get("last_edited_time") == stored["last_edited"]
+                    and _fetched_after_edit(stored_fetched_at, stored["last_edited"])):
+                if _generation(key) == generation:
+                    _page_content_cache[key] = stored
+                return stored
+            tree = await _fetch_block_tree(page_id)
+        else:
+            # Page properties and page blocks (content) are independent, so fetch both at once
+            page, tree = await asyncio.gather(
+                _notion_call(_client().pages.retrieve, idempotent=True, page_id=page_id),
+                _fetch_block_tree(page_id)
+            )
+            # An update_page that finished meanwhile has cached a newer page
+            if _generation(key) == generation:
+                _page_cache[key] = page
         
-        # Get page blocks (content)
-        blocks_response = notion.blocks.children.list(block_id=page_id)
+        title = _extract_title(page)
         
-        # Extract text content from blocks
+        # Extract text content from blocks, walking nested blocks in document order
         content_blocks = []
-        for block in blocks_response.get("results", []):
-            block_type = block.get("type")
-            block_content = block.get(block_type, {})
+        append = content_blocks.append
+        extractors = _EXTRACTORS
+        stack = [(block, 0) for block in reversed(tree[page_id])]
+        while stack:
+            block, depth = stack.pop()
+            stack.extend((child, depth + 1) for child in reversed(tree.get(block["id"], [])))
+            block_type = block["type"]
             
-            # Extract text from rich_text fields
-            if "rich_text" in block_content:
-                text = "".join([
-                    rt.get("plain_text", "") 
-                    for rt in block_content["rich_text"]
-                ])
-                if text:
-                    content_blocks.append({
-                        "type": block_type,
-                        "text": text
-                    })
+            # Extract text from block types that carry rich_text
+            extract = extractors.get(block_type)
+            if extract is None:
+                continue
+            text = extract(block[block_type])
+            if text:
+                append({
+                    "type": block_type,
+                    "text": text,
+                    "depth": depth
+                })
         
-        return {
+        result = {
             "success": True,
             "page_id": page_id,
             "title": title,
@@ -253,15 +729,21 @@ def get_page_content(page_id: str) -> Dict[str, Any]:
             "content": content_blocks,
             "last_edited": page.get("last_edited_time")
         }
+        # A write to this page may have landed while we were fetching, in
+        # which case this result can predate it and must not be cached
+        if _generation(key) == generation:
+            _page_content_cache[key] = result
+            await _write_disk_cache(key, result, fetched_at, generation)
+        return result
     
     except APIResponseError as e:
-        logger.error(f"Notion API error: {e}")
+        logger.error("Notion API error: %s", e)
         return {
             "success": False,
             "error": f"Notion API error: {str(e)}"
         }
     except Exception as e:
-        logger.error(f"Error retrieving page content: {e}")
+        logger.error("Error retrieving page content: %s", e)
         return {
             "success": False,
             "error": str(e)
@@ -269,53 +751,67 @@ def get_page_content(page_id: str) -> Dict[str, Any]:
 
 
 @mcp.tool()
-def append_to_page(page_id: str, content: str) -> Dict[str, Any]:
+async def get_pages_bulk(page_ids: List[str]) -> Dict[str, Any]:
+    """
+    Retrieve the content of several Notion pages in one call.
+    
+    Args:
+        page_ids: The IDs of the pages to retrieve
+    
+    Returns:
+        Dictionary containing one get_page_content result per page, in the order requested
+    """
+    # Pages are fetched concurrently; failures are reported per page by get_page_content
+    results = await asyncio.gather(*(get_page_content(page_id) for page_id in page_ids))
+    return {
+        "success": True,
+        "count": len(results),
+        "results": results
+    }
+
+
+@mcp.tool()
+async def append_to_page(page_id: str, content: Union[str, List[str]]) -> Dict[str, Any]:
     """
     Append new content to an existing Notion page.
     
     Args:
         page_id: The ID of the page to append to
-        content: The text content to append
+        content: The text content to append, or a list of paragraphs to append
     
     Returns:
         Dictionary indicating success or failure
     """
-    try:
-        # Create a new paragraph block
-        new_block = {
-            "object": "block",
-            "type": "paragraph",
-            "paragraph": {
-                "rich_text": [
-                    {
-                        "type": "text",
-                        "text": {
-                            "content": content
-                        }
-                    }
-                ]
-            }
+    if not _is_valid_id(page_id):
+        return {
+            "success": False,
+            "error": "Invalid page_id format"
         }
+    
+    try:
+        # Create a new paragraph block per entry
+        paragraphs = [content] if isinstance(content, str) else content
+        new_blocks = [_paragraph_block(text) for text in paragraphs]
         
-        # Append the block to the page
-        notion.blocks.children.append(
-            block_id=page_id,
-            children=[new_block]
-        )
+        # Append the blocks to the page in as few requests as possible
+        await _append_blocks(page_id, new_blocks)
+        _search_cache.clear()
         
-        return {
+        result = {
             "success": True,
             "message": f"Content appended to page {page_id}"
         }
+        await _invalidate_page_content(page_id)
+        return result
     
     except APIResponseError as e:
-        logger.error(f"Notion API error: {e}")
+        logger.error("Notion API error: %s", e)
         return {
             "success": False,
             "error": f"Notion API error: {str(e)}"
         }
     except Exception as e:
-        logger.error(f"Error appending to page: {e}")
+        logger.error("Error appending to page: %s", e)
         return {
             "success": False,
             "error": str(e)
@@ -323,7 +819,7 @@ def append_to_page(page_id: str, content: str) -> Dict[str, Any]:
 
 
 @mcp.tool()
-def update_page(page_id: str, title: Optional[str] = None, archived: Optional[bool] = None) -> Dict[str, Any]:
+async def update_page(page_id: str, title: Optional[str] = None, archived: Optional[bool] = None) -> Dict[str, Any]:
     """
     Update a Notion page's properties.
     
@@ -335,21 +831,17 @@ def update_page(page_id: str, title: Optional[str] = None, archived: Optional[bo
     Returns:
         Dictionary indicating success or failure
     """
+    if not _is_valid_id(page_id):
+        return {
+            "success": False,
+            "error": "Invalid page_id format"
+        }
+    
     try:
         update_data = {}
         
         if title is not None:
-            update_data["properties"] = {
-                "title": {
-                    "title": [
-                        {
-                            "text": {
-                                "content": title
-                            }
-                        }
-                    ]
-                }
-            }
+            update_data["properties"] = _title_property(title)
         
         if archived is not None:
             update_data["archived"] = archived
@@ -360,23 +852,37 @@ def update_page(page_id: str, title: Optional[str] = None, archived: Optional[bo
                 "error": "No update parameters provided"
             }
         
-        response = notion.pages.update(page_id=page_id, **update_data)
+        # Skip the write when only archiving is requested and the page is already in that state
+        cached_page = _page_cache.get(_page_key(page_id))
+        if title is None and cached_page is not None and cached_page.get("archived") == archived:
+            return {
+                "success": True,
+                "page_id": cached_page["id"],
+                "url": cached_page["url"],
+                "message": "no-op: page is already in the requested state"
+            }
         
-        return {
+        response = await _notion_call(_client().pages.update, page_id=page_id, **update_data)
+        _page_cache[_page_key(page_id)] = response
+        _search_cache.clear()
+        
+        result = {
             "success": True,
             "page_id": response["id"],
             "url": response["url"],
             "message": "Page updated successfully"
         }
+        await _invalidate_page_content(page_id)
+        return result
     
     except APIResponseError as e:
-        logger.error(f"Notion API error: {e}")
+        logger.error("Notion API error: %s", e)
         return {
             "success": False,
             "error": f"Notion API error: {str(e)}"
         }
     except Exception as e:
-        logger.error(f"Error updating page: {e}")
+        logger.error("Error updating page: %s", e)
         return {
             "success": False,
             "error": str(e)
@@ -384,13 +890,19 @@ def update_page(page_id: str, title: Optional[str] = None, archived: Optional[bo
 
 
 @mcp.tool()
-def create_database_entry(database_id: str, properties: Dict[str, Any]) -> Dict[str, Any]:
+async def create_database_entry(
+    database_id: str,
+    properties: Dict[str, Any],
+    idempotency_key: Optional[str] = None
+) -> Dict[str, Any]:
     """
     Create a new entry in a Notion database.
     
     Args:
         database_id: The ID of the database to add an entry to
         properties: Dictionary of properties for the new entry (structure depends on database schema)
+        idempotency_key: Optional unique key for this request. Retrying with the same key
+            within an hour returns the original result instead of creating a duplicate entry
     
     Returns:
         Dictionary with the created entry's ID and URL
@@ -402,11 +914,28 @@ def create_database_entry(database_id: str, properties: Dict[str, Any]) -> Dict[
             "Due Date": {"date": {"start": "2024-12-31"}}
         }
     """
+    if not _is_valid_id(database_id):
+        return {
+            "success": False,
+            "error": "Invalid database_id format"
+        }
+    
+    return await _run_idempotent(
+        "create_database_entry",
+        idempotency_key,
+        lambda: _create_database_entry(database_id, properties)
+    )
+
+
+async def _create_database_entry(database_id: str, properties: Dict[str, Any]) -> Dict[str, Any]:
+    """Create a database entry; the body of the create_database_entry tool."""
     try:
-        response = notion.pages.create(
+        response = await _notion_call(
+            _client().pages.create,
             parent={"database_id": database_id},
             properties=properties
         )
+        _search_cache.clear()
         
         return {
             "success": True,
@@ -416,57 +945,84 @@ def create_database_entry(database_id: str, properties: Dict[str, Any]) -> Dict[
         }
     
     except APIResponseError as e:
-        logger.error(f"Notion API error: {e}")
+        logger.error("Notion API error: %s", e)
         return {
             "success": False,
             "error": f"Notion API error: {str(e)}"
         }
     except Exception as e:
-        logger.error(f"Error creating database entry: {e}")
+        logger.error("Error creating database entry: %s", e)
         return {
             "success": False,
             "error": str(e)
         }
 
 
+@mcp.tool()
+async def invalidate_cache() -> Dict[str, Any]:
+    """
+    Clear cached search results, page state and page content so the next call hits Notion directly.
+    
+    Use this after editing pages outside of this server.
+    
+    Returns:
+        Dictionary indicating success
+    """
+    global _cache_epoch
+    _cache_epoch += 1
+    _search_cache.clear()
+    _page_cache.clear()
+    _page_content_cache.clear()
+    await asyncio.to_thread(_disk_cache_op, lambda conn: conn.execute("DELETE FROM pages"))
+    return {
+        "success": True,
+        "message": "Search and page content caches cleared"
+    }
+
+
 # ============================================================================
 # RESOURCES (Read-only data access)
 # ============================================================================
 
 @mcp.resource("notion://recent-pages")
-def get_recent_pages() -> str:
+async def get_recent_pages() -> str:
     """
     Get a list of recently edited pages in the Notion workspace.
     
     Returns:
         Formatted string with recent pages information
     """
+    key = ("recent",)
+    cached = _search_cache.get(key)
+    if cached is not None:
+        return cached
+    
     try:
-        response = notion.search(
+        response = await _notion_call(
+            _client().search,
             filter={"property": "object", "value": "page"},
             sort={"direction": "descending", "timestamp": "last_edited_time"},
             page_size=20
         )
         
-        output = ["# Recently Edited Pages\n"]
+        buf = io.StringIO()
+        buf.write("# Recently Edited Pages\n\n")
         
         for page in response.get("results", []):
-            title = "Untitled"
-            if "properties" in page:
-                for prop_name, prop_value in page["properties"].items():
-                    if prop_value.get("type") == "title" and prop_value.get("title"):
-                        title = prop_value["title"][0]["plain_text"]
-                        break
-            
-            output.append(f"- **{title}**")
-            output.append(f"  - ID: `{page['id']}`")
-            output.append(f"  - URL: {page['url']}")
-            output.append(f"  - Last edited: {page.get('last_edited_time', 'Unknown')}\n")
+            title = _extract_title(page)
+            buf.write(
+                f"- **{title}**\n"
+                f"  - ID: `{page['id']}`\n"
+                f"  - URL: {page['url']}\n"
+                f"  - Last edited: {page.get('last_edited_time', 'Unknown')}\n\n"
+            )
         
-        return "\n".join(output)
+        result = buf.getvalue()
+        _search_cache[key] = result
+        return result
     
     except Exception as e:
-        logger.error(f"Error getting recent pages: {e}")
+        logger.error("Error getting recent pages: %s", e)
         return f"Error retrieving recent pages: {str(e)}"
 
 
@@ -474,10 +1030,22 @@ def get_recent_pages() -> str:
 # MAIN ENTRY POINT
 # ============================================================================
 
+async def _serve():
+    """Run the stdio server and release the shared HTTP connection pool on exit."""
+    try:
+        await mcp.run_stdio_async()
+    finally:
+        await _client().aclose()
+
+
 def main():
     """Main entry point for the MCP server."""
+    # Load environment variables
+    load_dotenv()
+    # Build the client up front so a missing API key fails at startup
+    _client()
     logger.info("Starting Notion MCP Server")
-    mcp.run()
+    asyncio.run(_serve())
 
 
 if __name__ == "__main__":
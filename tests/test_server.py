@@ -0,0 +1,176 @@
+"""
+Regression tests for the page caches in notion_mcp.server, run against an
+in-memory fake of the Notion client.
+"""
+
+import asyncio
+import types
+from datetime import datetime, timedelta, timezone
+
+import httpx
+import pytest
+
+server = pytest.importorskip("notion_mcp.server")
+from notion_client.errors import APIResponseError
+
+PAGE_ID = "11111111222233334444555555555555"
+
+
+def _paragraph(block_id, text):
+    return {"id": block_id, "type": "paragraph", "has_children": False,
+            "paragraph": {"rich_text": [{"plain_text": text}]}}
+
+
+class FakeNotion:
+    """Just enough of notion_client.AsyncClient for one page of paragraphs."""
+
+    def __init__(self):
+        self.blocks_list = [_paragraph("a", "old")]
+        self.page = {"id": PAGE_ID, "url": "https://notion.so/p", "archived": False,
+                     "last_edited_time": "2024-01-01T00:00:00.000Z", "properties": {}}
+        # When set, the next block listing snapshots the page, then waits for
+        # `release` before returning that (by then stale) snapshot
+        self.listing = None
+        self.release = None
+        self.list_calls = 0
+        self.pages = types.SimpleNamespace(retrieve=self._retrieve, update=self._update)
+        self.blocks = types.SimpleNamespace(
+            children=types.SimpleNamespace(list=self._list, append=self._append)
+        )
+
+    async def _retrieve(self, page_id):
+        return dict(self.page)
+
+    async def _update(self, page_id, **kwargs):
+        self.page = dict(self.page, **kwargs)
+        return dict(self.page)
+
+    async def _list(self, block_id, page_size=100, start_cursor=None):
+        self.list_calls += 1
+        results = list(self.blocks_list)
+        if self.listing is not None:
+            listing, self.listing = self.listing, None
+            listing.set()
+            await self.release.wait()
+        return {"results": results, "has_more": False}
+
+    async def _append(self, block_id, children):
+        self.blocks_list += [_paragraph(f"b{i}", c["paragraph"]["rich_text"][0]["text"]["content"])
+                             for i, c in enumerate(children)]
+        return {}
+
+
+@pytest.fixture
+def notion(monkeypatch, tmp_path):
+    fake = FakeNotion()
+    monkeypatch.setenv("NOTION_PAGE_CACHE_PATH", str(tmp_path / "pages.sqlite3"))
+    monkeypatch.setattr(server, "_client", lambda: fake)
+    # AsyncLimiter is bound to one event loop, and each test runs its own
+    monkeypatch.setattr(server, "_limiter", server.AsyncLimiter(100, 1))
+    server._disk_cache.cache_clear()
+    server._inflight.cache_clear()
+    for cache in (server._search_cache, server._page_cache, server._page_content_cache):
+        cache.clear()
+    yield fake
+    if server._disk_cache() is not None:
+        server._disk_cache().close()
+    server._disk_cache.cache_clear()
+
+
+def _texts(result):
+    return [block["text"] for block in result["content"]]
+
+
+def test_read_overlapping_append_does_not_cache_stale_content(notion):
+    async def scenario():
+        notion.listing, notion.release = asyncio.Event(), asyncio.Event()
+        read = asyncio.create_task(server.get_page_content(PAGE_ID))
+        await notion.listing.wait()
+        assert (await server.append_to_page(PAGE_ID, "new"))["success"]
+        notion.release.set()
+        # The overlapping read may return what it saw, but must not cache it
+        assert _texts(await read) == ["old"]
+
+        assert _texts(await server.get_page_content(PAGE_ID)) == ["old", "new"]
+        server._page_content_cache.clear()
+        assert _texts(await server.get_page_content(PAGE_ID)) == ["old", "new"]
+
+    asyncio.run(scenario())
+
+
+def test_disk_cache_not_trusted_within_the_minute_of_last_edit(notion):
+    # Notion truncates last_edited_time to the minute, so a second edit in the
+    # same minute would leave it unchanged. Rounding from 30s ahead keeps the
+    # test clear of a minute boundary.
+    edited = datetime.now(timezone.utc) + timedelta(seconds=30)
+    notion.page["last_edited_time"] = edited.strftime("%Y-%m-%dT%H:%M:00.000Z")
+
+    async def scenario():
+        await server.get_page_content(PAGE_ID)
+        server._page_content_cache.clear()
+        await server.get_page_content(PAGE_ID)
+
+    asyncio.run(scenario())
+    assert notion.list_calls == 2
+
+
+def test_disk_cache_reused_when_fetched_after_last_edit(notion):
+    async def scenario():
+        await server.get_page_content(PAGE_ID)
+        server._page_content_cache.clear()
+        assert _texts(await server.get_page_content(PAGE_ID)) == ["old"]
+
+    asyncio.run(scenario())
+    assert notion.list_calls == 1
+
+
+def test_read_overlapping_update_does_not_overwrite_page_state(notion):
+    async def scenario():
+        notion.listing, notion.release = asyncio.Event(), asyncio.Event()
+        read = asyncio.create_task(server.get_page_content(PAGE_ID))
+        await notion.listing.wait()
+        assert (await server.update_page(PAGE_ID, archived=True))["success"]
+        notion.release.set()
+        await read
+
+        # The read retrieved the page before it was archived; if that copy were
+        # cached, unarchiving would be skipped as a no-op
+        result = await server.update_page(PAGE_ID, archived=False)
+        assert result["message"] == "Page updated successfully"
+
+    asyncio.run(scenario())
+    assert notion.page["archived"] is False
+
+
+def test_disk_cache_is_private_and_pruned(notion, monkeypatch, tmp_path):
+    monkeypatch.setattr(server, "PAGE_CACHE_MAX_ENTRIES", 2)
+    other_ids = ["22222222222233334444555555555555", "33333333222233334444555555555555"]
+
+    async def scenario():
+        for page_id in [PAGE_ID] + other_ids:
+            await server.get_page_content(page_id)
+
+    asyncio.run(scenario())
+    path = tmp_path / "pages.sqlite3"
+    assert path.stat().st_mode & 0o777 == 0o600
+    rows = server._disk_cache().execute("SELECT page_id FROM pages").fetchall()
+    assert sorted(row[0] for row in rows) == other_ids
+
+
+def test_server_errors_retried_for_reads_only(notion, monkeypatch):
+    monkeypatch.setattr(server, "_retry_delay", lambda error, attempt: 0)
+    calls = []
+
+    async def unavailable(**kwargs):
+        calls.append(kwargs)
+        raise APIResponseError(code="service_unavailable", status=503, message="down",
+                               headers=httpx.Headers(), raw_body_text="")
+
+    async def scenario():
+        for idempotent in (True, False):
+            with pytest.raises(APIResponseError):
+                await server._notion_call(unavailable, idempotent=idempotent, page_id=PAGE_ID)
+
+    asyncio.run(scenario())
+    assert len(calls) == server.MAX_RATE_LIMIT_RETRIES + 2
+    assert calls[0] == {"page_id": PAGE_ID}